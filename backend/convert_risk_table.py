@@ -0,0 +1,38 @@
+import os
+import sys
+import pandas as pd
+from pyarrow import feather
+
+# One-shot conversion of the fused risk table to an Arrow IPC file.
+# The API memory-maps it, so every uvicorn worker shares the same pages.
+# Run after the fusion notebook / data.py has (re)written final_risk_scored.csv:
+#   python convert_risk_table.py [path/to/final_risk_scored.csv]
+
+CSV_PATH = sys.argv[1] if len(sys.argv) > 1 else "../data/processed/final_risk_scored.csv"
+ARROW_PATH = os.path.splitext(CSV_PATH)[0] + ".arrow"
+
+DTYPES = {
+    "fraud_prob": "float32",
+    "gnn_fraud_prob": "float32",
+    "anomaly_score_norm": "float32",
+    "risk_score": "float32",
+    "alert": "category",
+    "is_fraud_predicted": "int8",
+    "class": "Int8",
+}
+
+df = pd.read_csv(CSV_PATH)
+
+# Dedupe here so the API doesn't have to on every startup: keep the
+# highest-risk row per txId, then store rows in txId order so the loader
+# can binary-search the column as-is
+df = df.sort_values("risk_score", ascending=False, kind="stable")
+df = df.drop_duplicates(subset=["txId"], keep="first").sort_values("txId", kind="stable")
+
+df = df.astype({col: dtype for col, dtype in DTYPES.items() if col in df.columns})
+
+# Uncompressed + one record batch so columns map straight to NumPy, no copy
+feather.write_feather(df.reset_index(drop=True), ARROW_PATH, compression="uncompressed", chunksize=len(df))
+
+print(f"✅ Converted {len(df):,} transactions")
+print(f"→ {ARROW_PATH}")
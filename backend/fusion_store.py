@@ -0,0 +1,396 @@
+import logging
+import os
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from numba import njit
+
+log = logging.getLogger("chainguard.store")
+
+# --------------------------------------------------
+# PATH SETUP
+# --------------------------------------------------
+
+# Allow running from project root OR from backend folder
+CWD = os.getcwd()
+BASE_DIR = os.path.abspath(os.path.join(CWD, "..")) if os.path.basename(CWD) == "backend" else CWD
+
+DATA_DIR = os.path.join(BASE_DIR, "data", "processed")
+RAW_DIR = os.path.join(BASE_DIR, "data", "raw")
+
+FINAL_RISK_PATH = os.path.join(DATA_DIR, "final_risk_scored.arrow")
+EDGELIST_PATH = os.path.join(RAW_DIR, "elliptic_txs_edgelist.csv")
+
+# --------------------------------------------------
+# LOOKUP HELPERS
+# --------------------------------------------------
+
+def _search(sorted_ids: np.ndarray, tx_id: int) -> int:
+    """Position of tx_id in sorted_ids, -1 if absent"""
+    pos = int(np.searchsorted(sorted_ids, tx_id))
+    if pos == len(sorted_ids) or sorted_ids[pos] != tx_id:
+        return -1
+    return pos
+
+
+def _txid_index(txid_arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(sorted_rows, sorted_ids) for searchsorted lookups. The converted
+    table is already stored in txId order, so the argsort is usually skipped."""
+    if np.all(txid_arr[1:] > txid_arr[:-1]):
+        return np.arange(len(txid_arr)), txid_arr
+    order = np.argsort(txid_arr, kind="stable")
+    return order, txid_arr[order]
+
+
+def _read_ipc(path: str) -> pa.Table:
+    """Memory-map an Arrow IPC file. Column buffers point into the mapping,
+    so the pages are shared by every worker process reading the file."""
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def _column(table: pa.Table, name: str, dtype, default=None) -> np.ndarray:
+    """Column as a NumPy array; zero-copy for a single null-free chunk"""
+    if name not in table.column_names:
+        return np.full(table.num_rows, default, dtype=dtype)
+    col = table.column(name)
+    if col.null_count and default is not None:
+        col = col.fill_null(default)
+    return col.to_numpy().astype(dtype, copy=False)
+
+
+def _codes(table: pa.Table, name: str) -> Tuple[np.ndarray, Tuple[str, ...]]:
+    """Integer codes + category strings for a low-cardinality string column"""
+    col = table.column(name)
+    if pa.types.is_dictionary(col.type) and col.num_chunks == 1 and not col.null_count:
+        chunk = col.chunk(0)
+        return chunk.indices.to_numpy(), tuple(chunk.dictionary.to_pylist())
+    # Plain string column (unconverted table): factorize, and keep the
+    # codes as small as Categorical would (1 byte/row for a few messages)
+    codes, uniques = pd.factorize(col.to_pandas(), use_na_sentinel=False)
+    return codes.astype(np.int8 if len(uniques) <= 127 else np.int32), tuple(str(u) for u in uniques)
+
+
+# risk_score bucket edges: [0, 40) low, [40, 60) medium, [60, ∞) high
+RISK_BUCKET_EDGES = np.array([40.0, 60.0], dtype=np.float32)
+
+
+# Not parallel=True: handlers run on a thread pool, and numba's default
+# workqueue threading layer can't take concurrent parallel launches.
+# nogil instead, so concurrent requests' kernels run on separate cores.
+@njit(cache=True, nogil=True)
+def _gather_and_bucket(ids, sorted_ids, sorted_rows, risk_score_arr, edges):
+    """Resolve ids to rows by binary search over sorted_ids (-1 where
+    unknown) and count found scores per bucket of edges in the same pass,
+    i.e. bincount(digitize(scores, edges)) without the temporaries."""
+    n = len(ids)
+    m = len(sorted_ids)
+    rows = np.empty(n, dtype=np.int64)
+    counts = np.zeros(len(edges) + 1, dtype=np.int64)
+    for k in range(n):
+        pos = np.searchsorted(sorted_ids, ids[k])
+        if pos < m and sorted_ids[pos] == ids[k]:
+            row = sorted_rows[pos]
+            rows[k] = row
+            counts[np.searchsorted(edges, risk_score_arr[row], side="right")] += 1
+        else:
+            rows[k] = -1
+    return rows, counts
+
+
+# --------------------------------------------------
+# FUSION STORE
+# --------------------------------------------------
+
+_NO_EDGES = np.empty(0, dtype=np.int64)
+
+
+def _build_csr(num_nodes: int, src: np.ndarray, dst: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """CSR (indptr, indices) of the src -> dst edges over dense node indices"""
+    order = np.argsort(src, kind="stable")
+    counts = np.bincount(src, minlength=num_nodes)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, dst[order]
+
+
+@njit(cache=True, nogil=True)
+def _bfs_within(out_indptr, out_indices, in_indptr, in_indices, start, depth):
+    """Dense node indices within depth hops of start over both CSR
+    directions, in BFS order, excluding start. The queue doubles as the
+    result; head/tail cursors mark where each level starts and ends."""
+    n = len(out_indptr) - 1
+    visited = np.zeros(n, dtype=np.uint8)
+    queue = np.empty(n, dtype=np.int32)
+    visited[start] = 1
+    queue[0] = start
+    head = 0
+    tail = 1
+    for _ in range(depth):
+        level_end = tail
+        # Stop once a level adds nothing, or every node is already reached
+        if head == level_end or tail == n:
+            break
+        while head < level_end:
+            u = queue[head]
+            head += 1
+            for k in range(out_indptr[u], out_indptr[u + 1]):
+                v = out_indices[k]
+                if not visited[v]:
+                    visited[v] = 1
+                    queue[tail] = v
+                    tail += 1
+            for k in range(in_indptr[u], in_indptr[u + 1]):
+                v = in_indices[k]
+                if not visited[v]:
+                    visited[v] = 1
+                    queue[tail] = v
+                    tail += 1
+    return queue[1:tail]
+
+
+# Columns the risk table must have; is_fraud_predicted and class are optional
+REQUIRED_COLUMNS = {
+    "txId",
+    "fraud_prob",
+    "gnn_fraud_prob",
+    "anomaly_score_norm",
+    "risk_score",
+    "alert",
+}
+
+# Alerts that mark a transaction as flagged in the graph view
+FLAG_ALERTS = ("CRITICAL", "Block Transaction", "High Risk")
+
+
+class FusionStore:
+    """Risk table + transaction graph, loaded once per process (see get_store)"""
+
+    def __init__(self, risk_path: str = FINAL_RISK_PATH, edgelist_path: str = EDGELIST_PATH):
+        if not os.path.exists(risk_path):
+            raise FileNotFoundError(f"Risk scores not found at: {risk_path} (run convert_risk_table.py first)")
+        # The mapping/top-N side of the API re-reads the CSVs when they change;
+        # refuse to serve scores from an .arrow older than its source CSV
+        csv_path = os.path.splitext(risk_path)[0] + ".csv"
+        if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(risk_path):
+            raise RuntimeError(f"{risk_path} is older than {csv_path} (re-run convert_risk_table.py)")
+        
+        # Already deduped + downcast by convert_risk_table.py
+        print(f"[FusionStore] Loading risk table from {risk_path}")
+        self.table = _read_ipc(risk_path)
+        missing = REQUIRED_COLUMNS - set(self.table.column_names)
+        if missing:
+            raise ValueError(f"{risk_path} is missing required columns: {sorted(missing)}")
+        
+        # Structure-of-arrays view + sorted txId index for fast lookups.
+        # Nulls (and the optional columns) are resolved here once instead of
+        # per request.
+        t = self.table
+        self._txid_arr = _column(t, "txId", np.int64)
+        self._fraud_prob_arr = _column(t, "fraud_prob", np.float32, 0.0)
+        self._gnn_fraud_prob_arr = _column(t, "gnn_fraud_prob", np.float32, 0.0)
+        self._anomaly_arr = _column(t, "anomaly_score_norm", np.float32, 0.0)
+        self._risk_score_arr = _column(t, "risk_score", np.float32, 0.0)
+        self._is_fraud_predicted_arr = _column(t, "is_fraud_predicted", np.int8, 0)
+        self._class_arr = _column(t, "class", np.int8, 2)
+        self._alert_codes, self._alert_categories = _codes(t, "alert")
+
+        self._sorted_rows, self._sorted_ids = _txid_index(self._txid_arr)
+
+        # Graph highlight rule, evaluated once per row: fraud class, then a
+        # high risk score, a flagging alert, or either model's probability
+        alert_flags = np.isin(np.array(self._alert_categories, dtype=object), FLAG_ALERTS)
+        self._flagged_arr = (
+            (self._class_arr == 1)
+            | (self._risk_score_arr >= 80)
+            | alert_flags[self._alert_codes]
+            | (self._fraud_prob_arr >= 0.9)
+            | (self._gnn_fraud_prob_arr >= 0.9)
+        )
+
+        # Rows by descending risk_score, sorted once so top-K is a prefix slice
+        self._top_order = np.argsort(-self._risk_score_arr, kind="stable")
+        
+        print(f"[FusionStore] Loaded {self.table.num_rows:,} transactions")
+        
+        # Load edgelist for graph visualization. Only the two id columns, as
+        # int64 via Arrow; the frame is dropped once the CSR arrays exist.
+        if os.path.exists(edgelist_path):
+            edgelist = pd.read_csv(
+                edgelist_path, usecols=["txId1", "txId2"],
+                dtype={"txId1": "int64", "txId2": "int64"}, engine="pyarrow",
+            )
+            print(f"[FusionStore] Loaded {len(edgelist):,} edges")
+        else:
+            print(f"⚠️ Warning: edgelist not found")
+            edgelist = pd.DataFrame({"txId1": _NO_EDGES, "txId2": _NO_EDGES})
+
+        # CSR adjacency in both directions over the sorted node ids, so a
+        # neighbour query is an O(degree) slice instead of an edgelist scan.
+        # Nodes are dense int32 indices into _node_ids (half the size of
+        # txIds, and BFS can mark them in a plain bool array).
+        src = edgelist["txId1"].to_numpy(np.int64)
+        dst = edgelist["txId2"].to_numpy(np.int64)
+        self._node_ids = np.unique(np.concatenate([src, dst]))
+        src = np.searchsorted(self._node_ids, src).astype(np.int32)
+        dst = np.searchsorted(self._node_ids, dst).astype(np.int32)
+        self._out_indptr, self._out_indices = _build_csr(len(self._node_ids), src, dst)
+        self._in_indptr, self._in_indices = _build_csr(len(self._node_ids), dst, src)
+
+    def has_tx(self, tx_id: int) -> bool:
+        """Whether txId is in the risk table"""
+        return _search(self._sorted_ids, tx_id) >= 0
+
+    def _node(self, tx_id: int) -> int:
+        """CSR node offset for txId, -1 if it has no edges"""
+        return _search(self._node_ids, tx_id)
+
+    def outgoing(self, tx_id: int) -> np.ndarray:
+        """txIds that tx_id sends to"""
+        node = self._node(tx_id)
+        if node < 0:
+            return _NO_EDGES
+        return self._node_ids[self._out_indices[self._out_indptr[node]:self._out_indptr[node + 1]]]
+
+    def incoming(self, tx_id: int) -> np.ndarray:
+        """txIds that send to tx_id"""
+        node = self._node(tx_id)
+        if node < 0:
+            return _NO_EDGES
+        return self._node_ids[self._in_indices[self._in_indptr[node]:self._in_indptr[node + 1]]]
+
+    def neighborhood(self, tx_id: int, depth: int) -> np.ndarray:
+        """Sorted txIds within depth hops of tx_id (either direction), excluding tx_id"""
+        start = self._node(tx_id)
+        if start < 0 or depth < 1:
+            return _NO_EDGES
+        reached = _bfs_within(
+            self._out_indptr, self._out_indices,
+            self._in_indptr, self._in_indices,
+            start, depth,
+        )
+        # Dense indices follow txId order, so sorting them sorts the ids
+        return self._node_ids[np.sort(reached)]
+
+    def get_by_id(self, tx_id: int) -> Optional[Dict[str, Any]]:
+        """Get transaction risk data by txId"""
+        pos = _search(self._sorted_ids, tx_id)
+        if pos < 0:
+            log.debug("⚠️ Transaction %s not found", tx_id)
+            return None
+        i = self._sorted_rows[pos]
+
+        return {
+            "txId": int(tx_id),
+            "fraud_prob": float(self._fraud_prob_arr[i]),
+            "gnn_fraud_prob": float(self._gnn_fraud_prob_arr[i]),
+            "anomaly_score_norm": float(self._anomaly_arr[i]),
+            "risk_score": float(self._risk_score_arr[i]),
+            "alert": self._alert_categories[self._alert_codes[i]],
+            "is_fraud_predicted": int(self._is_fraud_predicted_arr[i]),
+            "class": int(self._class_arr[i]),
+        }
+
+    def risk_flags(self, tx_ids) -> Tuple[np.ndarray, np.ndarray]:
+        """risk_score and flagged per txId (0 / False where unknown)"""
+        rows = self._rows_for(tx_ids)
+        found = rows >= 0
+        rows = np.where(found, rows, 0)
+        return np.where(found, self._risk_score_arr[rows], 0), found & self._flagged_arr[rows]
+
+    def get_top(self, k: int = 10) -> List[Dict[str, Any]]:
+        """Get top K riskiest transactions"""
+        rows = self._top_order[:k]
+        alerts = self._alert_categories
+        
+        return [
+            {
+                "txId": tx_id,
+                "risk_score": risk,
+                "fraud_prob": fraud,
+                "gnn_fraud_prob": gnn,
+                "alert": alerts[code],
+                "class": cls,
+            }
+            for tx_id, risk, fraud, gnn, code, cls in zip(
+                self._txid_arr[rows].tolist(),
+                self._risk_score_arr[rows].tolist(),
+                self._fraud_prob_arr[rows].tolist(),
+                self._gnn_fraud_prob_arr[rows].tolist(),
+                self._alert_codes[rows].tolist(),
+                self._class_arr[rows].tolist(),
+            )
+        ]
+    
+    def _gather(self, ids: np.ndarray):
+        """Rows for ids (-1 where unknown) plus low/medium/high bucket counts"""
+        return _gather_and_bucket(
+            np.ascontiguousarray(ids, dtype=np.int64),
+            self._sorted_ids, self._sorted_rows, self._risk_score_arr,
+            RISK_BUCKET_EDGES,
+        )
+
+    def _rows_for(self, ids: np.ndarray) -> np.ndarray:
+        """Row index for each txId in ids, -1 where unknown"""
+        rows, _ = self._gather(ids)
+        return rows
+
+    def get_batch(self, tx_ids: List[int]) -> pd.DataFrame:
+        """Get multiple transactions at once"""
+        # Remove duplicates while preserving order
+        ids = pd.unique(np.asarray(tx_ids, dtype=np.int64))
+        rows = self._rows_for(ids)
+        return self._frame(rows[rows >= 0])
+
+    def lookup(self, tx_ids) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Look up tx_ids in request order (duplicates kept).
+
+        Returns a boolean mask of which ids were found, and a DataFrame
+        with one row per found id.
+        """
+        rows = self._rows_for(tx_ids)
+        found = rows >= 0
+        return found, self._frame(rows[found])
+
+    def lookup_bucketed(self, tx_ids) -> Tuple[np.ndarray, pd.DataFrame, Dict[str, int]]:
+        """lookup(), plus low/medium/high risk counts over the found ids"""
+        rows, counts = self._gather(tx_ids)
+        found = rows >= 0
+        low, medium, high = counts.tolist()
+        buckets = {"low_risk": low, "medium_risk": medium, "high_risk": high}
+        return found, self._frame(rows[found]), buckets
+
+    def _frame(self, rows: np.ndarray) -> pd.DataFrame:
+        """Gather the given rows from the column arrays into a DataFrame"""
+        return pd.DataFrame({
+            "txId": self._txid_arr[rows],
+            "fraud_prob": self._fraud_prob_arr[rows],
+            "gnn_fraud_prob": self._gnn_fraud_prob_arr[rows],
+            "anomaly_score_norm": self._anomaly_arr[rows],
+            "risk_score": self._risk_score_arr[rows],
+            "alert": pd.Categorical.from_codes(self._alert_codes[rows], self._alert_categories),
+            "is_fraud_predicted": self._is_fraud_predicted_arr[rows],
+            "class": self._class_arr[rows],
+        })
+
+
+@lru_cache(maxsize=1)
+def get_store() -> FusionStore:
+    """The process-wide FusionStore, loaded on first use"""
+    return FusionStore()
+
+
+# === Test the store ===
+if __name__ == "__main__":
+    store = get_store()
+    
+    # Test single lookup
+    first_tx = int(store.table.column("txId")[0].as_py())
+    print("\n[TEST] Single transaction:")
+    print(store.get_by_id(first_tx))
+    
+    # Test top risky
+    print("\n[TEST] Top 5 risky:")
+    for tx in store.get_top(5):
+        print(f"  Tx {tx['txId']}: Risk={tx['risk_score']:.1f}, Alert={tx['alert']}")
@@ -1,17 +1,30 @@
 import pandas as pd
-import hashlib
+from hashlib import sha256
 
 SALT = b"chainguard-privacy-123"
 
+# SHA-256 state with the salt already absorbed; copied per id so the
+# salt isn't re-hashed for every row
+_SALTED = sha256(SALT)
+
 def hash_id(raw):
-    m = hashlib.sha256()
-    m.update(SALT)
+    m = _SALTED.copy()
     m.update(str(raw).encode())
     return m.hexdigest()
 
+def hash_ids(raw_ids):
+    """hash_id over a whole column of already-encoded ids"""
+    copy = _SALTED.copy
+    hashes = []
+    for b in raw_ids:
+        m = copy()
+        m.update(b)
+        hashes.append(m.hexdigest())
+    return hashes
+
 df = pd.read_csv("../data/processed/final_risk_scored.csv")
 
-df["secure_id"] = df["txId"].apply(hash_id)
+df["secure_id"] = hash_ids(df["txId"].astype(str).str.encode("utf-8"))
 
 # backend keeps original real txId (private)
 df.to_csv("../data/processed/final_risk_scored_private.csv", index=False)
@@ -1,20 +1,57 @@
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
+import asyncio
+import csv
 import io
+import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Tuple
+from bisect import bisect_left, bisect_right
+import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 from datetime import datetime
 from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
-from fusion_predictor import FusionPredictor
+from fusion_store import get_store
+
+log = logging.getLogger("chainguard")
+logging.basicConfig(level=os.environ.get("CHAINGUARD_LOG_LEVEL", "INFO"))
 
 app = FastAPI(
     title="ChainGuard API",
     description="DeFi Fraud Risk Detection",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
+# One shared pool for the CPU-heavy handlers (CSV parsing, PDF rendering)
+# instead of tying up the event loop or spinning up threads per request
+EXECUTOR_WORKERS = min(8, os.cpu_count() or 1)
+_executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="chainguard")
+
+# Bulk CSV jobs may hold at most half the pool, so a burst of large
+# uploads queues up instead of starving /report or piling up in memory
+_bulk_slots = asyncio.Semaphore(max(1, EXECUTOR_WORKERS // 2))
+
+
+@app.on_event("shutdown")
+def _shutdown_executor():
+    _executor.shutdown(wait=False)
+
+
+async def _offload(fn, *args):
+    """Run fn(*args) on the shared executor and await the result"""
+    return await asyncio.get_running_loop().run_in_executor(_executor, partial(fn, *args))
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -24,30 +61,155 @@ app.add_middleware(
 )
 
 # ========== Load Data with Hashing ==========
-df_private = pd.read_csv("../data/processed/final_risk_scored_private.csv")
-df_public = pd.read_csv("../data/processed/final_risk_scored_public.csv")
+# Only the columns the API serves, in compact dtypes, parsed by Arrow.
+# alert holds a handful of distinct messages; as a category it is 1 byte/row.
+PRIVATE_CSV = "../data/processed/final_risk_scored_private.csv"
+PUBLIC_CSV = "../data/processed/final_risk_scored_public.csv"
+CSV_DTYPES = {
+    "txId": "int64",
+    "secure_id": "string[pyarrow]",
+    "risk_score": "float32",
+    "fraud_prob": "float32",
+    "gnn_fraud_prob": "float32",
+    "alert": "category",
+}
+PRIVATE_COLUMNS = ["txId", "risk_score", "fraud_prob", "gnn_fraud_prob", "alert", "class"]
+PUBLIC_COLUMNS = ["secure_id", "txId"]
+
+
+def _read_columns(path: str, wanted: list) -> Tuple[pd.DataFrame, list]:
+    """(frame of the wanted columns present in the CSV, full header)
+
+    The parsed columns are cached next to the CSV as Parquet; later starts
+    read just those columns from it until the CSV is rewritten.
+    """
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    usecols = [c for c in wanted if c in header]
+    cache = os.path.splitext(path)[0] + ".parquet"
+    if (
+        os.path.exists(cache)
+        and os.path.getmtime(cache) >= os.path.getmtime(path)
+        and set(usecols) <= set(pq.read_schema(cache).names)
+    ):
+        return pd.read_parquet(cache, columns=usecols), header
+
+    dtype = {c: CSV_DTYPES[c] for c in usecols if c in CSV_DTYPES}
+    df = pd.read_csv(path, usecols=usecols, dtype=dtype, engine="pyarrow")
+    try:
+        tmp = f"{cache}.{os.getpid()}.tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, cache)
+    except OSError:
+        log.warning("Could not cache %s as Parquet", path)
+    return df, header
+
+
+df_private, private_columns = _read_columns(PRIVATE_CSV, PRIVATE_COLUMNS)
+df_public, public_columns = _read_columns(PUBLIC_CSV, PUBLIC_COLUMNS)
+
+print("🔍 Public CSV columns:", public_columns)
+print("🔍 Private CSV columns:", private_columns)
+print("🔍 Public CSV shape:", (len(df_public), len(public_columns)))
+
+class _SortedMap:
+    """Read-only key -> value map over sorted NumPy arrays.
+
+    Lookups are a binary search over one contiguous key array (secure_ids
+    as fixed-width UTF-8 bytes) instead of hashing into a dict of ~200k
+    Python strings. Duplicate keys (repeated rows) keep their first value.
+    """
+
+    def __init__(self, keys: pd.Series, values: pd.Series):
+        self._text = not pd.api.types.is_numeric_dtype(keys)
+        self.keys, first = np.unique(self._prep(keys.to_numpy()), return_index=True)
+        self.values = values.to_numpy()[first]
+
+    def _prep(self, keys) -> np.ndarray:
+        if self._text:
+            keys = np.asarray(keys, dtype=object)
+            try:
+                # secure_ids are hex, so the direct ASCII cast nearly always works
+                return keys.astype("S")
+            except UnicodeEncodeError:
+                return np.char.encode(keys.astype(str), "utf-8")
+        return np.asarray(keys, dtype=np.int64)
+
+    def positions(self, keys) -> Tuple[np.ndarray, np.ndarray]:
+        """(index into keys/values, found) for an array of keys"""
+        keys = self._prep(keys)
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=np.intp), np.zeros(len(keys), dtype=bool)
+        pos = np.searchsorted(self.keys, keys)
+        pos[pos == len(self.keys)] = 0
+        return pos, self.keys[pos] == keys
+
+    def lookup(self, keys) -> Tuple[np.ndarray, np.ndarray]:
+        """(values, found) for an array of keys; values are junk where not found"""
+        pos, found = self.positions(keys)
+        if not len(self.keys):
+            return np.empty(len(found), dtype=self.values.dtype), found
+        return self.values[pos], found
+
+    def map(self, keys, default=None) -> np.ndarray:
+        """Value for each key, default where the key is unknown"""
+        values, found = self.lookup(keys)
+        out = np.full(len(found), default, dtype=object)
+        out[found] = values[found]
+        return out
+
+    def _find(self, key) -> int:
+        """Index of a single key, or -1. Skips the array round-trip of
+        positions(), which dominates the cost of a one-key lookup."""
+        if self._text:
+            key = str(key).encode("utf-8")
+            # Longer than any stored key: can't match, and searching would
+            # widen the whole key array to the longer width
+            if len(key) > self.keys.dtype.itemsize:
+                return -1
+        else:
+            key = int(key)
+        i = int(np.searchsorted(self.keys, key))
+        return i if i < len(self.keys) and self.keys[i] == key else -1
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        return self.values[i] if i >= 0 else default
+
+    def __len__(self) -> int:
+        return len(self.keys)
 
-print("🔍 Public CSV columns:", df_public.columns.tolist())
-print("🔍 Private CSV columns:", df_private.columns.tolist())
-print("🔍 Public CSV shape:", df_public.shape)
 
 if "txId" not in df_public.columns:
     print("⚠️  txId not found in public CSV. Assuming row alignment with private CSV...")
     if len(df_public) != len(df_private):
         raise ValueError(f"Mismatch: public CSV has {len(df_public)} rows, private has {len(df_private)} rows")
     
-    secure_to_real = dict(zip(df_public["secure_id"], df_private["txId"]))
-    real_to_secure = dict(zip(df_private["txId"], df_public["secure_id"]))
+    secure_to_real = _SortedMap(df_public["secure_id"], df_private["txId"])
+    real_to_secure = _SortedMap(df_private["txId"], df_public["secure_id"])
 else:
     print("✅ txId found in public CSV")
-    secure_to_real = dict(zip(df_public["secure_id"], df_public["txId"]))
-    real_to_secure = dict(zip(df_public["txId"], df_public["secure_id"]))
+    secure_to_real = _SortedMap(df_public["secure_id"], df_public["txId"])
+    real_to_secure = _SortedMap(df_public["txId"], df_public["secure_id"])
+
+predictor = get_store()
+
+# /graph node labels, aligned with real_to_secure's arrays
+secure_labels = np.array([f"TX {sid[:8]}..." for sid in real_to_secure.values], dtype=object)
 
-predictor = FusionPredictor()
+# df_private never changes, so rank it by risk once; /top/{n} is then a head(n)
+df_top_sorted = (
+    df_private.sort_values("risk_score", ascending=False, kind="stable", na_position="last")
+    [["txId", "risk_score", "fraud_prob", "gnn_fraud_prob", "alert"]]
+    .reset_index(drop=True)
+)
+df_top_sorted["secure_id"] = real_to_secure.map(df_top_sorted["txId"])
+df_top_sorted = df_top_sorted.drop(columns=["txId"])
 
 print(f"✅ Loaded {len(secure_to_real)} secure_id mappings")
-print(f"✅ Sample secure_id: {list(secure_to_real.keys())[0][:16]}...")
-print(f"✅ Sample txId: {list(secure_to_real.values())[0]}")
+# Sample straight off the sorted arrays; guarded like /health for an empty table
+if len(real_to_secure):
+    print(f"✅ Sample secure_id: {real_to_secure.values[0][:16]}...")
+    print(f"✅ Sample txId: {real_to_secure.keys[0]}")
 
 
 @app.get("/")
@@ -55,63 +217,100 @@ def root():
     return {"message": "🚀 ChainGuard API is running!"}
 
 
+@lru_cache(maxsize=100_000)
+def _tx_payload(real_id: int):
+    """/tx body for a txId minus secure_id, or None. The store never changes
+    after startup, so dashboards re-polling an id are served from here."""
+    tx = predictor.get_by_id(real_id)
+    if tx:
+        tx.pop("txId", None)
+    return tx
+
+
 @app.get("/tx/{secure_id}")
 def get_transaction_risk(secure_id: str):
     """Get transaction risk by secure_id"""
     try:
-        print(f"🔍 Looking up secure_id: {secure_id}")
+        log.debug("🔍 Looking up secure_id: %s", secure_id)
         
-        if secure_id not in secure_to_real:
-            print(f"❌ secure_id not in mapping")
+        real_id = secure_to_real.get(secure_id)
+        if real_id is None:
+            log.debug("❌ secure_id not in mapping")
             raise HTTPException(404, "Unknown transaction")
-
-        real_id = secure_to_real[secure_id]
-        print(f"✅ Mapped to real_id: {real_id}")
+        log.debug("✅ Mapped to real_id: %s", real_id)
         
-        tx = predictor.get_by_id(real_id)
-        print(f"📊 Transaction data: {tx}")
+        tx = _tx_payload(int(real_id))
+        log.debug("📊 Transaction data: %s", tx)
         
         if not tx:
-            print(f"❌ No data returned from predictor.get_by_id({real_id})")
+            log.debug("❌ No data returned from predictor.get_by_id(%s)", real_id)
             raise HTTPException(404, "Transaction data not found")
 
-        tx["secure_id"] = secure_id
-        tx.pop("txId", None)
-        return tx
+        # Copy, so the cached payload is never mutated
+        return {**tx, "secure_id": secure_id}
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error in /tx/{secure_id}:", e)
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Error in /tx/%s", secure_id)
         raise HTTPException(500, f"Internal error: {str(e)}")
 
 
-@app.post("/batch")
-async def get_batch_results(file: UploadFile = File(...)):
-    """Upload CSV with secure_id or txId column for batch analysis"""
-    if not file.filename.endswith((".csv", ".txt")):
-        raise HTTPException(400, "Please upload a CSV file")
+# In preference order: secure_id wins when a file has both
+# txId is left for Arrow to infer: spreadsheets and pandas write "123.0"
+# once a column has held a NaN, so it may arrive as int64 or double
+ID_COLUMN_TYPES = {"secure_id": pa.string(), "txId": None}
 
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
 
-    if "secure_id" in df.columns:
-        df["txId"] = df["secure_id"].map(secure_to_real)
-        df = df.dropna(subset=["txId"])
-        tx_ids = df["txId"].astype(int).tolist()
-    elif "txId" in df.columns:
-        tx_ids = df["txId"].astype(int).tolist()
-    else:
+def _read_tx_ids(f) -> np.ndarray:
+    """Real txIds from an uploaded CSV's secure_id (preferred) or txId column.
+
+    Only the header line is read up front; Arrow's multi-threaded reader
+    then parses just the id column straight off the spooled upload.
+    """
+    header = next(csv.reader([f.readline().decode("utf-8-sig")]), [])
+    f.seek(0)
+    id_col = next((c for c in ID_COLUMN_TYPES if c in header), None)
+    if id_col is None:
         raise HTTPException(400, "CSV must contain 'secure_id' or 'txId' column")
 
-    results = []
-    for tx_id in tx_ids:
-        tx = predictor.get_by_id(tx_id)
-        if tx:
-            tx["secure_id"] = real_to_secure.get(tx_id, "N/A")
-            tx.pop("txId", None)
-            results.append(tx)
+    column_types = {c: t for c, t in ID_COLUMN_TYPES.items() if t is not None}
+    try:
+        column = pacsv.read_csv(
+            f,
+            convert_options=pacsv.ConvertOptions(
+                include_columns=[id_col], column_types=column_types
+            ),
+        ).column(id_col).drop_null()
+    except pa.ArrowInvalid as e:
+        raise HTTPException(400, f"Could not parse CSV: {e}")
+
+    if id_col == "secure_id":
+        tx_ids, hit = secure_to_real.lookup(column.to_numpy(zero_copy_only=False))
+        return tx_ids[hit]
+
+    if pa.types.is_integer(column.type):
+        return column.to_numpy().astype(np.int64, copy=False)
+    if pa.types.is_floating(column.type):
+        values = column.to_numpy()
+        if np.all(np.isfinite(values) & (values == np.floor(values))):
+            return values.astype(np.int64)
+    elif len(column) == 0:
+        return np.empty(0, dtype=np.int64)
+    raise HTTPException(400, "txId column must contain whole numbers")
+
+
+def _process_batch_file(f) -> dict:
+    """Parse a /batch upload and look its ids up (blocking)"""
+    tx_ids = _read_tx_ids(f)
+
+    # Look up and build a record once per distinct id, then fan the
+    # records back out to request order (repeats share one dict)
+    unique_ids, inverse = np.unique(tx_ids, return_inverse=True)
+    hit, found = predictor.lookup(unique_ids)
+    found["secure_id"] = real_to_secure.map(found["txId"], "N/A")
+    records = found.drop(columns=["txId"]).to_dict(orient="records")
+    record_of = np.cumsum(hit) - 1
+    results = [records[i] for i in record_of[inverse[hit[inverse]]].tolist()]
 
     return {
         "total_requested": len(tx_ids),
@@ -120,214 +319,221 @@ async def get_batch_results(file: UploadFile = File(...)):
     }
 
 
+@app.post("/batch")
+async def get_batch_results(file: UploadFile = File(...)):
+    """Upload CSV with secure_id or txId column for batch analysis"""
+    if not file.filename.endswith((".csv", ".txt")):
+        raise HTTPException(400, "Please upload a CSV file")
+
+    # Large payload of plain values: serialize directly, skipping jsonable_encoder
+    async with _bulk_slots:
+        result = await _offload(_process_batch_file, file.file)
+    return ORJSONResponse(result)
+
+
+@lru_cache(maxsize=64)
+def _top_records(n: int) -> tuple:
+    """First n rows of df_top_sorted as records, built once per n"""
+    return tuple(df_top_sorted.head(n).to_dict(orient="records"))
+
+
 @app.get("/top/{n}")
 def top_riskiest(n: int = 10):
     """Get top N riskiest transactions"""
-    df_top = df_private.nlargest(n, 'risk_score')[['txId', 'risk_score', 'fraud_prob', 
-                                                      'gnn_fraud_prob', 'alert']]
-    df_top["secure_id"] = df_top["txId"].map(real_to_secure)
-    df_top = df_top.drop(columns=["txId"])
-    return df_top.to_dict(orient="records")
+    # Clamp so out-of-range n values share one cache entry
+    return list(_top_records(min(max(n, 0), len(df_top_sorted))))
 
 
-@app.get("/graph/{secure_id}")
-async def get_graph(secure_id: str, depth: int = 1):
-    """Get transaction graph with configurable depth"""
+# /graph default neighbour cap, so a hub at depth 2 stays renderable,
+# and the deepest expansion the UI offers
+MAX_GRAPH_NEIGHBORS = 200
+MAX_GRAPH_DEPTH = 3
+
+
+def _graph_body(secure_id: str, depth: int, max_neighbors: int) -> bytes:
+    """Encoded /graph JSON for the given node, depth and neighbour cap"""
     try:
-        print(f"🔍 Graph request for secure_id: {secure_id}, depth: {depth}")
+        log.debug("🔍 Graph request for secure_id: %s, depth: %s", secure_id, depth)
         
-        if secure_id not in secure_to_real:
-            print(f"❌ secure_id not found: {secure_id}")
+        tx_id = secure_to_real.get(secure_id)
+        if tx_id is None:
+            log.debug("❌ secure_id not found: %s", secure_id)
             raise HTTPException(status_code=404, detail="Transaction not found")
         
-        tx_id = secure_to_real[secure_id]
-        print(f"✅ Converted to txId: {tx_id}")
-        
-        if not hasattr(predictor, 'df'):
-            print("❌ predictor.df not found")
-            raise HTTPException(status_code=500, detail="Predictor not initialized properly")
-            
-        if "txId" not in predictor.df.columns:
-            print("❌ txId column not in predictor.df")
-            print(f"Available columns: {predictor.df.columns.tolist()}")
-            raise HTTPException(status_code=500, detail="txId column missing from predictor data")
+        log.debug("✅ Converted to txId: %s", tx_id)
         
-        if tx_id not in predictor.df["txId"].values:
-            print(f"❌ txId {tx_id} not found in predictor.df")
+        if not predictor.has_tx(tx_id):
+            log.debug("❌ txId %s not found in the risk table", tx_id)
             raise HTTPException(status_code=404, detail="TxID not found in graph")
 
-        edges = predictor.edgelist
-        print(f"✅ Edgelist loaded: {len(edges)} edges")
-        
-        def get_neighbors(current_tx_id, current_depth, max_depth, visited):
-            if current_depth >= max_depth or current_tx_id in visited:
-                return set()
-            
-            visited.add(current_tx_id)
-            neighbors = set()
-            
-            outgoing = edges[edges["txId1"] == current_tx_id]["txId2"].values
-            incoming = edges[edges["txId2"] == current_tx_id]["txId1"].values
-            
-            neighbors.update(outgoing)
-            neighbors.update(incoming)
-            
-            if current_depth < max_depth - 1:
-                for n in list(neighbors):
-                    neighbors.update(get_neighbors(int(n), current_depth + 1, max_depth, visited))
-            
-            return neighbors
-        
-        all_neighbors = get_neighbors(tx_id, 0, depth, set())
-        print(f"✅ Found {len(all_neighbors)} neighbors at depth {depth}")
-
-        outgoing = edges[edges["txId1"] == tx_id]["txId2"].values
-        incoming = edges[edges["txId2"] == tx_id]["txId1"].values
+        neighbor_ids = predictor.neighborhood(tx_id, depth)
+        all_neighbors = neighbor_ids.tolist()
+        log.debug("✅ Found %d neighbors at depth %d", len(all_neighbors), depth)
 
         nodes = [{"id": secure_id, "label": f"TX {secure_id[:8]}...", "type": "center"}]
         edges_res = []
 
         if not all_neighbors:
-            print("ℹ️ No neighbors found")
-            return {"nodes": nodes, "edges": []}
-
-        for n in all_neighbors:
-            neighbor_secure_id = real_to_secure.get(int(n), f"unknown_{n}")
+            log.debug("ℹ️ No neighbors found")
+            return orjson.dumps({"nodes": nodes, "edges": []})
+
+        # Risk, flag, secure_id and label for every neighbour in one
+        # vectorized pass each instead of a row fetch per node
+        risks, flags = predictor.risk_flags(neighbor_ids)
+        if 0 < max_neighbors < len(neighbor_ids):
+            # Hubs at depth > 1 can reach thousands of nodes; keep the
+            # riskiest ones, still in txId order
+            keep = np.sort(np.argsort(-risks, kind="stable")[:max_neighbors])
+            neighbor_ids, risks, flags = neighbor_ids[keep], risks[keep], flags[keep]
+            all_neighbors = neighbor_ids.tolist()
+            log.debug("✂️ Capped to the %d riskiest neighbors", max_neighbors)
+        log.debug("🚩 %d of %d neighbors flagged", np.count_nonzero(flags), len(flags))
+        pos, known = real_to_secure.positions(neighbor_ids)
+        # Edge direction relative to the centre: direct successors are
+        # outgoing, direct predecessors incoming, anything deeper indirect
+        directions = np.where(
+            np.isin(neighbor_ids, predictor.outgoing(tx_id)), "outgoing",
+            np.where(np.isin(neighbor_ids, predictor.incoming(tx_id)), "incoming", "indirect"),
+        )
+        neighbors = zip(
+            all_neighbors, risks.tolist(), flags.tolist(), known.tolist(),
+            real_to_secure.values[pos].tolist(), secure_labels[pos].tolist(),
+            directions.tolist(),
+        )
+        for n, neighbor_risk, is_flagged, is_known, neighbor_secure_id, neighbor_label, direction in neighbors:
+            if not is_known:
+                neighbor_secure_id = f"unknown_{n}"
+                neighbor_label = "TX unknown_..."
             
-            neighbor_tx = predictor.get_by_id(int(n))
-            neighbor_risk = neighbor_tx.get("risk_score", 0) if neighbor_tx else 0
-            
-            is_flagged = False
-            
-            if neighbor_tx:
-                # PRIORITY 1: Check 'class' column FIRST (most reliable)
-                if "class" in neighbor_tx:
-                    class_val = neighbor_tx["class"]
-                    is_flagged = (class_val == 1 or class_val == "1")
-                    print(f"  Checking class for {neighbor_secure_id[:16]}... - class={class_val}, flagged={is_flagged}")
-                
-                # PRIORITY 2: Check risk score threshold (only if class not set)
-                if not is_flagged and neighbor_risk >= 80:
-                    is_flagged = True
-                    print(f"  Flagged by risk score: {neighbor_risk}")
-                
-                # PRIORITY 3: Check alert status
-                if not is_flagged and neighbor_tx.get("alert") in ["CRITICAL", "Block Transaction", "High Risk"]:
-                    is_flagged = True
-                    print(f"  Flagged by alert status")
-                
-                # PRIORITY 4: Check fraud probability threshold
-                if not is_flagged:
-                    fraud_prob = neighbor_tx.get("fraud_prob", 0)
-                    gnn_prob = neighbor_tx.get("gnn_fraud_prob", 0)
-                    if fraud_prob >= 0.9 or gnn_prob >= 0.9:
-                        is_flagged = True
-                        print(f"  Flagged by fraud probability")
-            
-            print(f"  Final: Node {neighbor_secure_id[:16]}... - Risk: {neighbor_risk:.2f}, Flagged: {is_flagged}")
-            
-            if int(n) in outgoing:
-                edges_res.append({
-                    "source": secure_id, 
-                    "target": neighbor_secure_id,
-                    "direction": "outgoing"
-                })
-            elif int(n) in incoming:
+            if direction == "incoming":
                 edges_res.append({
                     "source": neighbor_secure_id,
                     "target": secure_id,
-                    "direction": "incoming"
+                    "direction": direction
                 })
             else:
                 edges_res.append({
-                    "source": secure_id,
+                    "source": secure_id, 
                     "target": neighbor_secure_id,
-                    "direction": "indirect"
+                    "direction": direction
                 })
             
             nodes.append({
                 "id": neighbor_secure_id, 
-                "label": f"TX {neighbor_secure_id[:8]}...", 
+                "label": neighbor_label, 
                 "type": "neighbor",
                 "risk": neighbor_risk,
                 "is_flagged": is_flagged
             })
 
-        print(f"✅ Returning {len(nodes)} nodes and {len(edges_res)} edges")
-        return {"nodes": nodes, "edges": edges_res}
+        log.debug("✅ Returning %d nodes and %d edges", len(nodes), len(edges_res))
+        # Plain dicts/lists already; serialize directly, skipping jsonable_encoder
+        return orjson.dumps({"nodes": nodes, "edges": edges_res})
 
     except HTTPException:
         raise
     except Exception as e:
-        print("❌ Graph Error:", e)
-        import traceback
-        traceback.print_exc()
+        log.exception("❌ Graph Error")
         raise HTTPException(status_code=500, detail=f"Graph building error: {str(e)}")
 
 
-@app.post("/upload")
-async def upload_csv(file: UploadFile = File(...)):
-    """Upload CSV for bulk processing"""
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="Only CSV allowed")
+# Graph and scores never change after startup, so repeat views of a node
+# are served from here; errors aren't cached. Only capped bodies go in
+# (~70 KB at 200 neighbours), which bounds this at well under 100 MB.
+_cached_graph_body = lru_cache(maxsize=1_024)(_graph_body)
 
-    content = await file.read()
-    df = pd.read_csv(io.BytesIO(content))
-
-    if "secure_id" in df.columns:
-        df["txId"] = df["secure_id"].map(secure_to_real)
-        df = df.dropna(subset=["txId"])
-    elif "txId" not in df.columns:
-        raise HTTPException(status_code=400, detail="CSV must contain 'secure_id' or 'txId' column")
-
-    results = []
-    for _, row in df.iterrows():
-        tx_id = int(row["txId"])
-        tx = predictor.get_by_id(tx_id)
-        if tx:
-            tx["secure_id"] = real_to_secure.get(tx_id, "N/A")
-            tx.pop("txId", None)
-            results.append(tx)
-        else:
-            results.append({"secure_id": real_to_secure.get(tx_id, "N/A"), "error": "Not in database"})
 
-    final_df = pd.DataFrame(results)
+@app.get("/graph/{secure_id}")
+def get_graph(secure_id: str, depth: int = 1, max_neighbors: int = MAX_GRAPH_NEIGHBORS):
+    """Get transaction graph with configurable depth (max_neighbors=0: no cap)"""
+    depth = min(max(depth, 0), MAX_GRAPH_DEPTH)
+    if 0 < max_neighbors <= MAX_GRAPH_NEIGHBORS:
+        body = _cached_graph_body(secure_id, depth, max_neighbors)
+    else:
+        # Uncapped bodies can span a whole component; build them per request
+        body = _graph_body(secure_id, depth, max_neighbors)
+    return Response(body, media_type="application/json")
+
+
+def _process_upload(f) -> dict:
+    """Parse an uploaded CSV, score it and write bulk_output.csv (blocking)"""
+    # One batched gather instead of a get_by_id call per row
+    tx_ids = _read_tx_ids(f)
+    found, final_df, buckets = predictor.lookup_bucketed(tx_ids)
+
+    # Rows already come back in upload order; only re-align (and add
+    # error rows) when some ids weren't in the table
+    final_df = final_df.drop(columns=["txId"])
+    all_found = found.all()
+    if not all_found:
+        final_df = final_df.set_axis(np.flatnonzero(found)).reindex(np.arange(len(tx_ids)))
+    final_df["secure_id"] = real_to_secure.map(tx_ids, "N/A")
+    if not all_found:
+        final_df["error"] = np.where(found, None, "Not in database")
 
     out_dir = os.path.join("data", "processed")
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, "bulk_output.csv")
-    final_df.to_csv(out_path, index=False)
+    # Arrow's CSV writer streams typed column blocks in C instead of
+    # formatting row by row; the file stays CSV for /download/bulk.
+    # Uploads run concurrently on the executor, so each writes its own temp
+    # file and swaps it in; /download/bulk never sees mixed or partial rows
+    tmp_path = f"{out_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    pacsv.write_csv(pa.Table.from_pandas(final_df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, out_path)
 
-    valid_scores = final_df[final_df["risk_score"].notna()]["risk_score"]
-    
     return {
-        "count": len(results),
-        "high_risk": int((valid_scores >= 60).sum()) if len(valid_scores) > 0 else 0,
-        "medium_risk": int(((valid_scores >= 40) & (valid_scores < 60)).sum()) if len(valid_scores) > 0 else 0,
-        "low_risk": int((valid_scores < 40).sum()) if len(valid_scores) > 0 else 0,
+        "count": len(final_df),
+        "high_risk": buckets["high_risk"],
+        "medium_risk": buckets["medium_risk"],
+        "low_risk": buckets["low_risk"],
         "file": "/download/bulk"
     }
 
 
-@app.get("/report/{secure_id}")
-def generate_report(secure_id: str):
-    """Generate PDF report for transaction by secure_id"""
-    
-    if secure_id not in secure_to_real:
-        raise HTTPException(status_code=404, detail="Transaction not found")
-    
-    tx_id = secure_to_real[secure_id]
-    tx = predictor.get_by_id(tx_id)
-    
-    if not tx:
-        raise HTTPException(status_code=404, detail="Transaction data not found")
+@app.post("/upload")
+async def upload_csv(file: UploadFile = File(...)):
+    """Upload CSV for bulk processing"""
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="Only CSV allowed")
 
-    filename = f"tx_{secure_id[:16]}_report.pdf"
-    out_dir = os.path.join("data", "processed")
-    os.makedirs(out_dir, exist_ok=True)
-    filepath = os.path.join(out_dir, filename)
+    # Parsing + lookup + CSV write are CPU/disk bound; keep them off the event loop
+    async with _bulk_slots:
+        return await _offload(_process_upload, file.file)
+
+
+# ========== PDF Report Template ==========
+# Geometry and drawing for everything on the report page that doesn't
+# depend on the transaction, so generate_report only draws the values.
+REPORT_BAR_X = 50
+REPORT_BAR_Y = A4[1] - 340
+REPORT_BAR_WIDTH = 400
+REPORT_BAR_HEIGHT = 20
+REPORT_BAR_MARKERS = [
+    (REPORT_BAR_X + (marker / 100) * REPORT_BAR_WIDTH - 5, str(marker))
+    for marker in [0, 25, 50, 75, 100]
+]
+
+# Risk level per score band: bisect_right(REPORT_RISK_EDGES, score) picks
+# (label, score color, recommendation box color) without an if-ladder
+REPORT_RISK_EDGES = (40, 60, 80)
+REPORT_RISK_LEVELS = (
+    ("LOW RISK", (0.1, 0.7, 0.3), (0.95, 1, 0.95)),
+    ("  MEDIUM RISK", (1, 0.7, 0), (1, 0.98, 0.9)),
+    ("  HIGH RISK", (1, 0.4, 0), (1, 0.95, 0.95)),
+    ("  CRITICAL RISK", (0.9, 0.1, 0.1), (1, 0.95, 0.95)),
+)
+
+REPORT_TIME_FORMAT = "%B %d, %Y at %H:%M:%S UTC"
 
-    c = canvas.Canvas(filepath, pagesize=A4)
+# Model probability colors: bisect_left(REPORT_PROB_EDGES, p) is 0 for
+# p <= 0.4, 1 for p <= 0.6, 2 above
+REPORT_PROB_EDGES = (0.4, 0.6)
+REPORT_PROB_COLORS = ((0.1, 0.5, 0.1), (1, 0.6, 0), (0.9, 0.1, 0.1))
+
+
+def _draw_report_template(c):
+    """Draw the static header, labels, risk bar track and footer"""
     width, height = A4
 
     # Dark header bar
@@ -346,37 +552,70 @@ def generate_report(secure_id: str):
     c.setLineWidth(3)
     c.line(50, height - 85, width - 50, height - 85)
 
-    # Transaction metadata section
-    c.setFillColorRGB(0, 0, 0)
+    # Section titles
     c.setFont("Helvetica", 10)
     c.setFillColorRGB(0.4, 0.4, 0.4)
     c.drawString(50, height - 120, "TRANSACTION ANALYSIS REPORT")
+
+    c.setFont("Helvetica", 11)
+    c.setFillColorRGB(0.3, 0.3, 0.3)
+    c.drawString(50, height - 220, "OVERALL RISK SCORE")
+
+    # Risk indicator bar background + score markers
+    c.setFillColorRGB(0.9, 0.9, 0.9)
+    c.rect(REPORT_BAR_X, REPORT_BAR_Y, REPORT_BAR_WIDTH, REPORT_BAR_HEIGHT, fill=True, stroke=False)
+
+    c.setFont("Helvetica", 8)
+    c.setFillColorRGB(0.5, 0.5, 0.5)
+    for x, label in REPORT_BAR_MARKERS:
+        c.drawString(x, REPORT_BAR_Y - 15, label)
+
+    # Model predictions section
+    c.setFont("Helvetica-Bold", 14)
+    c.setFillColorRGB(0, 0, 0)
+    c.drawString(50, height - 380, "AI Model Analysis")
+    
+    c.setStrokeColorRGB(0.8, 0.8, 0.8)
+    c.setLineWidth(1)
+    c.line(50, height - 385, width - 50, height - 385)
+
+    c.setFont("Helvetica", 11)
+    c.setFillColorRGB(0.2, 0.2, 0.2)
+    c.drawString(50, height - 415, "XGBoost Fraud Detection:")
+    c.drawString(50, height - 440, "Graph Neural Network Analysis:")
+
+    # Footer disclaimer
+    c.setFont("Helvetica-Oblique", 9)
+    c.setFillColorRGB(0.5, 0.5, 0.5)
+    c.drawString(50, 60, "⚠ This report uses advanced machine learning and graph neural networks")
+    c.drawString(50, 45, "to identify fraudulent patterns in blockchain transactions.")
     
+    c.setFont("Helvetica-Bold", 8)
+    c.setFillColorRGB(0.7, 0, 0)
+    c.drawString(50, 25, "CONFIDENTIAL - FOR AUTHORIZED PERSONNEL ONLY")
+
+
+def _render_report(secure_id: str, tx: dict) -> bytes:
+    """Draw the PDF report for one transaction and return its bytes (blocking)"""
+    # Render in memory; the report is only ever sent back, never reused
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+    _draw_report_template(c)
+
+    # Transaction metadata
     c.setFont("Helvetica", 9)
+    c.setFillColorRGB(0.4, 0.4, 0.4)
     c.drawString(50, height - 140, f"Transaction ID: {secure_id[:32]}...")
-    c.drawString(50, height - 155, f"Report Generated: {datetime.now().strftime('%B %d, %Y at %H:%M:%S UTC')}")
+    c.drawString(50, height - 155, f"Report Generated: {datetime.now():{REPORT_TIME_FORMAT}}")
 
     # Risk Score - Large and prominent
     score = float(tx.get("risk_score", 0))
     
     y_pos = height - 220
-    c.setFont("Helvetica", 11)
-    c.setFillColorRGB(0.3, 0.3, 0.3)
-    c.drawString(50, y_pos, "OVERALL RISK SCORE")
     
     # Determine risk level and color
-    if score >= 80: 
-        risk = "  CRITICAL RISK"
-        color = (0.9, 0.1, 0.1)
-    elif score >= 60: 
-        risk = "  HIGH RISK"
-        color = (1, 0.4, 0)
-    elif score >= 40: 
-        risk = "  MEDIUM RISK"
-        color = (1, 0.7, 0)
-    else: 
-        risk = "LOW RISK"
-        color = (0.1, 0.7, 0.3)
+    risk, color, box_color = REPORT_RISK_LEVELS[bisect_right(REPORT_RISK_EDGES, score)]
 
     # Large risk score number
     c.setFont("Helvetica-Bold", 72)
@@ -386,105 +625,79 @@ def generate_report(secure_id: str):
     c.setFont("Helvetica-Bold", 24)
     c.drawString(180, y_pos - 60, risk)
 
-    # Risk indicator bar
-    bar_width = 400
-    bar_height = 20
-    bar_x = 50
-    bar_y = y_pos - 120
-    
-    # Background bar
-    c.setFillColorRGB(0.9, 0.9, 0.9)
-    c.rect(bar_x, bar_y, bar_width, bar_height, fill=True, stroke=False)
-    
-    # Filled portion
-    fill_width = (score / 100) * bar_width
-    c.setFillColorRGB(*color)
-    c.rect(bar_x, bar_y, fill_width, bar_height, fill=True, stroke=False)
-    
-    # Score markers
-    c.setFont("Helvetica", 8)
-    c.setFillColorRGB(0.5, 0.5, 0.5)
-    for marker in [0, 25, 50, 75, 100]:
-        x = bar_x + (marker / 100) * bar_width
-        c.drawString(x - 5, bar_y - 15, str(marker))
-
-    # Model predictions section
-    y_pos = height - 380
-    c.setFont("Helvetica-Bold", 14)
-    c.setFillColorRGB(0, 0, 0)
-    c.drawString(50, y_pos, "AI Model Analysis")
-    
-    c.setStrokeColorRGB(0.8, 0.8, 0.8)
-    c.setLineWidth(1)
-    c.line(50, y_pos - 5, width - 50, y_pos - 5)
+    # Filled portion of the risk indicator bar
+    fill_width = (score / 100) * REPORT_BAR_WIDTH
+    c.rect(REPORT_BAR_X, REPORT_BAR_Y, fill_width, REPORT_BAR_HEIGHT, fill=True, stroke=False)
 
-    y_pos -= 35
+    # Model prediction values (labels are in the template)
+    y_pos = height - 415
     fraud_prob = tx.get('fraud_prob', 0)
     gnn_prob = tx.get('gnn_fraud_prob', 0)
     
-    c.setFont("Helvetica", 11)
-    c.setFillColorRGB(0.2, 0.2, 0.2)
-    c.drawString(50, y_pos, "XGBoost Fraud Detection:")
     c.setFont("Helvetica-Bold", 11)
-    prob_color = (0.9, 0.1, 0.1) if fraud_prob > 0.6 else (1, 0.6, 0) if fraud_prob > 0.4 else (0.1, 0.5, 0.1)
-    c.setFillColorRGB(*prob_color)
+    c.setFillColorRGB(*REPORT_PROB_COLORS[bisect_left(REPORT_PROB_EDGES, fraud_prob)])
     c.drawString(300, y_pos, f"{fraud_prob*100:.2f}%")
     
     y_pos -= 25
-    c.setFont("Helvetica", 11)
-    c.setFillColorRGB(0.2, 0.2, 0.2)
-    c.drawString(50, y_pos, "Graph Neural Network Analysis:")
-    c.setFont("Helvetica-Bold", 11)
-    gnn_color = (0.9, 0.1, 0.1) if gnn_prob > 0.6 else (1, 0.6, 0) if gnn_prob > 0.4 else (0.1, 0.5, 0.1)
-    c.setFillColorRGB(*gnn_color)
+    c.setFillColorRGB(*REPORT_PROB_COLORS[bisect_left(REPORT_PROB_EDGES, gnn_prob)])
     c.drawString(300, y_pos, f"{gnn_prob*100:.2f}%")
 
     anomaly = tx.get("anomaly_score_norm") or tx.get("anomaly_score")
     if anomaly is not None:
+        # Value first, while the bold 11pt font is still set
         y_pos -= 25
+        c.setFillColorRGB(0.3, 0.3, 0.3)
+        c.drawString(300, y_pos, f"{anomaly:.4f}")
         c.setFont("Helvetica", 11)
         c.setFillColorRGB(0.2, 0.2, 0.2)
         c.drawString(50, y_pos, "Anomaly Detection Score:")
-        c.setFont("Helvetica-Bold", 11)
-        c.setFillColorRGB(0.3, 0.3, 0.3)
-        c.drawString(300, y_pos, f"{anomaly:.4f}")
 
-    # Recommendation section with colored box
+    # Recommendation section with colored box; the box goes first so the
+    # title and alert share one black fill (they don't overlap it)
     y_pos -= 60
-    c.setFont("Helvetica-Bold", 14)
-    c.setFillColorRGB(0, 0, 0)
-    c.drawString(50, y_pos, "Recommended Action")
-    
-    y_pos -= 30
-    # Background box for recommendation
-    box_color = (1, 0.95, 0.95) if score >= 60 else (1, 0.98, 0.9) if score >= 40 else (0.95, 1, 0.95)
+    box_y = y_pos - 30 - 45
     c.setFillColorRGB(*box_color)
-    c.rect(50, y_pos - 45, width - 100, 60, fill=True, stroke=False)
+    c.rect(50, box_y, width - 100, 60, fill=True, stroke=False)
     
     # Border
     c.setStrokeColorRGB(*color)
     c.setLineWidth(2)
-    c.rect(50, y_pos - 45, width - 100, 60, fill=False, stroke=True)
+    c.rect(50, box_y, width - 100, 60, fill=False, stroke=True)
+
+    c.setFillColorRGB(0, 0, 0)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(50, y_pos, "Recommended Action")
     
     alert = tx.get('alert', 'Review transaction for compliance')
     c.setFont("Helvetica-Bold", 12)
-    c.setFillColorRGB(0, 0, 0)
-    c.drawString(65, y_pos - 20, alert)
-
-    # Footer disclaimer
-    c.setFont("Helvetica-Oblique", 9)
-    c.setFillColorRGB(0.5, 0.5, 0.5)
-    c.drawString(50, 60, "⚠ This report uses advanced machine learning and graph neural networks")
-    c.drawString(50, 45, "to identify fraudulent patterns in blockchain transactions.")
-    
-    c.setFont("Helvetica-Bold", 8)
-    c.setFillColorRGB(0.7, 0, 0)
-    c.drawString(50, 25, "CONFIDENTIAL - FOR AUTHORIZED PERSONNEL ONLY")
+    c.drawString(65, y_pos - 50, alert)
 
     c.showPage()
     c.save()
+    return buf.getvalue()
 
-    return FileResponse(filepath, filename=filename, media_type="application/pdf")
+
+@app.get("/report/{secure_id}")
+async def generate_report(secure_id: str):
+    """Generate PDF report for transaction by secure_id"""
+    
+    tx_id = secure_to_real.get(secure_id)
+    if tx_id is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+    
+    tx = predictor.get_by_id(tx_id)
+    
+    if not tx:
+        raise HTTPException(status_code=404, detail="Transaction data not found")
+
+    filename = f"tx_{secure_id[:16]}_report.pdf"
+    pdf = await _offload(_render_report, secure_id, tx)
+
+    return Response(
+        content=pdf,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @app.get("/download/bulk")
@@ -504,14 +717,14 @@ def health_check():
     return {
         "status": "healthy",
         "total_transactions": len(secure_to_real),
-        "sample_secure_id": list(secure_to_real.keys())[0] if secure_to_real else None,
+        "sample_secure_id": real_to_secure.values[0] if len(real_to_secure) else None,
         "predictor_loaded": predictor is not None
     }
 
 
-@app.get("/debug/flagged")
-def get_flagged_stats():
-    """Debug endpoint to check flagged transaction detection"""
+@lru_cache(maxsize=1)
+def _flagged_stats() -> dict:
+    """/debug/flagged body; df_private is static, so it is built only once"""
     try:
         import math
         
@@ -541,13 +754,12 @@ def get_flagged_stats():
                         "risk_score": float(risk_score),
                         "class": int(row.get("class", 2))
                     })
-            except Exception as e:
-                print(f"Error checking class column: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                log.exception("Error checking class column")
         
         try:
-            high_risk_count = len(df_private[df_private["risk_score"] >= 80])
+            # Count straight off the column; no filtered copy of df_private
+            high_risk_count = np.count_nonzero(df_private["risk_score"].to_numpy() >= 80)
             
             if flagged_count == 0:
                 high_risk_txs = df_private.nlargest(5, 'risk_score')
@@ -566,20 +778,22 @@ def get_flagged_stats():
                         "risk_score": float(risk_score),
                         "note": "Auto-flagged by risk score"
                     })
-        except Exception as e:
-            print(f"Error checking risk scores: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            log.exception("Error checking risk scores")
         
         return {
             "has_class_column": has_class_column,
             "total_flagged_by_class": int(flagged_count),
             "total_high_risk": int(high_risk_count),
             "sample_flagged_transactions": sample_flagged,
-            "columns_available": df_private.columns.tolist()
+            "columns_available": private_columns
         }
     except Exception as e:
-        print(f"Debug endpoint error: {e}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Debug error: {str(e)}")
\ No newline at end of file
+        log.exception("Debug endpoint error")
+        raise HTTPException(status_code=500, detail=f"Debug error: {str(e)}")
+
+
+@app.get("/debug/flagged")
+def get_flagged_stats():
+    """Debug endpoint to check flagged transaction detection"""
+    return _flagged_stats()
\ No newline at end of file
@@ -1,10 +1,18 @@
+import os
 import pandas as pd
-df2 = pd.read_csv("../data/processed/final_risk_scored.csv")
-df2['class'] = 0
-df2.loc[df2['risk_score'] >= 80, 'class'] = 1
-df2.loc[df2['fraud_prob'] >= 0.85, 'class'] = 1
-df2.loc[df2['gnn_fraud_prob'] >= 0.85, 'class'] = 1
-df2.to_csv("../data/processed/final_risk_scored.csv", index=False)
+
+RISK_CSV = "../data/processed/final_risk_scored.csv"
+
+df2 = pd.read_csv(RISK_CSV)
+# One fused mask instead of three .loc passes; 0/1 fits in int8
+df2['class'] = (
+    (df2['risk_score'] >= 80) | (df2['fraud_prob'] >= 0.85) | (df2['gnn_fraud_prob'] >= 0.85)
+).astype('int8')
+# Write next to the input and swap it in, so a failed write can't
+# leave final_risk_scored.csv truncated
+tmp_path = RISK_CSV + ".tmp"
+df2.to_csv(tmp_path, index=False)
+os.replace(tmp_path, RISK_CSV)
 print(f"✅ Flagged {(df2['class'] == 1).sum()} transactions in final_risk_scored.csv")
 
 